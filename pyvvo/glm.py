@@ -15,9 +15,9 @@ Original functions (modified) from Jacob and Ebony:
         Helper function to parse glm
     sorted_write(inTree):
         Main function to write out glm
-    _dict_to_string(inDict):
+    _dict_to_string(inDict, write):
         Helper function to write out glm
-    _gather_key_values(inDict, keyToAvoid):
+    _gather_key_values(inDict, keyToAvoid, write):
         Helper function to write out glm
 
 
@@ -33,9 +33,9 @@ for the Government, including the right to distribute to other
 Government contractors.
 """
 
+import io
 import re
 import warnings
-from functools import reduce
 from datetime import datetime
 import logging
 import random
@@ -78,6 +78,51 @@ TRIPLEX_PARAMS = \
      'impedance_fraction_1', 'impedance_fraction_2', 'impedance_fraction_12'
      ]
 
+# Regular expression for tokenizing a GLM in a single pass. Comments
+# match, but are not captured, so they yield empty strings which get
+# filtered out. Otherwise, capture semicolons, braces, newlines,
+# parameter expansions (e.g. ${VSOURCE}), and everything else up to the
+# next delimiter, whitespace, or comment. Parameter expansions end at
+# the first closing brace so that several expansions on one line don't
+# run together. A '$' which doesn't start a complete expansion (e.g.
+# '${' with no closing brace on the line) is kept as part of a regular
+# token, so nothing but whitespace and comments is ever dropped. Note
+# that '//' is not treated as the start of a comment if it directly
+# follows 'http:' or 'https:', so URLs (e.g. for stylesheets) are left
+# intact.
+#
+# Tokens are matched in the "unrolled loop" form
+# (plain|special)plain*(special plain*)*, so that the common case is a
+# single run of plain characters, which the regular expression engine
+# handles in one tight loop. Only '/' and '$' require look-arounds.
+_PLAIN = r'[^\s;{}/$]'
+_SPECIAL = r'(?:/(?!/)|(?<=http:)//|(?<=https:)//|\$(?!\{[^}\n]*\}))'
+_TOKEN_RE = re.compile(r'//[^\n]*|([;{}\n]|\$\{[^}\n]*\}'
+                       + r'|(?:{p}|{s}){p}*(?:{s}{p}*)*)'.format(p=_PLAIN,
+                                                                 s=_SPECIAL))
+
+
+# Pairs of (key, item type) used by GLMManager._get_item_type. An
+# item's type is given by the first key it contains, so order matters
+# (e.g. objects can have a 'clock' property). Objects are by far the
+# most common items, so they come first.
+_ITEM_TYPES = (('object', 'object'), ('module', 'module'), ('clock', 'clock'),
+               ('#include', 'include'), ('#set', 'set'),
+               ('#define', 'define'), ('omftype', 'omftype'),
+               ('class', 'class'))
+
+# Properties which get truncated by _gather_key_values if they're
+# longer than _MAX_NAME_LENGTH characters, which is too long for
+# GridLAB-D.
+_LONG_FIELDS = frozenset(('name', 'parent'))
+_MAX_NAME_LENGTH = 62
+
+# Tokens which end a "full token" in _parse_token_list.
+_STOP_TOKENS = frozenset(('{', ';', '}', '\n', 'shape'))
+
+# Full tokens which consist of only one of these carry no information.
+_EMPTY_TOKENS = frozenset(('\n', ';'))
+
 
 def parse(input_str, file_path=True):
     """
@@ -87,11 +132,22 @@ def parse(input_str, file_path=True):
     Input can be a file path or GLM string.
     """
 
+    return _parse_with_guid(input_str, file_path)[0]
+
+
+def _parse_with_guid(input_str, file_path=True):
+    """Same as parse, but also return the next unused key (guid) in
+    the tree.
+
+    Keys are handed out in increasing order starting from 0, including
+    keys for nested items. So, every key in the tree (at any level of
+    nesting) is less than the returned guid.
+    """
+
     tokens = _tokenize_glm(input_str, file_path)
     return _parse_token_list(tokens)
 
 
-# noinspection RegExpRedundantEscape
 def _tokenize_glm(input_str, file_path=True):
     """ Turn a GLM file/string into a linked list of tokens.
 
@@ -112,17 +168,12 @@ def _tokenize_glm(input_str, file_path=True):
 
     else:
         data = input_str
-    # Get rid of http for stylesheets because we don't need it and it conflicts
-    # with comment syntax.
-    data = re.sub(r'http:\/\/', '', data)
-    # Strip comments.
-    data = re.sub(r'\/\/.*(\s*)', '', data)
-    # Also strip non-single whitespace because it's only for humans:
-    data = data.replace('\r', '').replace('\t', ' ')
-    # Tokenize around semicolons, braces, whitespace, and ${<stuff>}.
-    tokenized = re.split(r'(;|\}|\{|\s|\$\{.*\})', data)
-    # Get rid of whitespace strings.
-    basic_list = [x for x in tokenized if x != '' and x != ' ']
+
+    # Scan the whole model once. Whitespace (aside from newlines)
+    # doesn't match at all and is skipped, while comments come back as
+    # empty strings.
+    basic_list = list(filter(None, _TOKEN_RE.findall(data)))
+
     return basic_list
 
 
@@ -137,6 +188,7 @@ def _parse_token_list(token_list):
     """
     Given a list of tokens from a GLM, parse those into a tree data structure.
 
+    Returns the tree and the next unused guid.
     """
 
     def current_leaf_add(key_f, value, tree_f, guid_stack_f):
@@ -163,11 +215,10 @@ def _parse_token_list(token_list):
 
     def list_to_string(list_in):
         # Helper function to turn a list of strings into one string with some
-        # decent formatting.
-        if len(list_in) == 0:
-            return ''
-        else:
-            return reduce(lambda x, y: str(x) + ' ' + str(y), list_in[1:-1])
+        # decent formatting. The first and last tokens (e.g. the
+        # property name and the ';') are left off. All tokens are
+        # strings, so they can be joined directly.
+        return ' '.join(list_in[1:-1])
 
     # Tree variables.
     tree = {}
@@ -175,14 +226,14 @@ def _parse_token_list(token_list):
     guid_stack = []
 
     # reverse the token list as pop() is way more efficient than pop(0)
-    token_list = list(reversed(token_list))
+    token_list = token_list[::-1]
 
     def get_full_token():
         nonlocal token_list
         # Pop, then keep going until we have a full token (i.e. 'object house',
         # not just 'object')
-        ft = []
-        while ft == [] or ft[-1] not in ['{', ';', '}', '\n', 'shape']:
+        ft = [token_list.pop()]
+        while ft[-1] not in _STOP_TOKENS:
             ft.append(token_list.pop())
 
         return ft
@@ -244,10 +295,10 @@ def _parse_token_list(token_list):
         full_token = get_full_token()
 
         # Work with what we've collected.
-        if (full_token == ['\n']) or (full_token == [';']):
+        if len(full_token) == 1 and full_token[0] in _EMPTY_TOKENS:
             # Nothing to do.
             continue
-        elif full_token == ['}']:
+        elif len(full_token) == 1 and full_token[0] == '}':
             close_out_item()
         elif full_token[0] == '#set':
             if full_token[-1] == ';':
@@ -264,7 +315,7 @@ def _parse_token_list(token_list):
                 tree[guid] = {'#include': list_to_string(full_token)}
             guid += 1
         elif full_token[0] == 'shape':
-            while full_token[-1] not in ['\n']:
+            while full_token[-1] != '\n':
                 full_token.append(token_list.pop())
             full_token[-2] = ''
             current_leaf_add(full_token[0], list_to_string(full_token[0:-1]),
@@ -310,8 +361,8 @@ def _parse_token_list(token_list):
             add_item_definition()
         elif full_token[-1] == '\n' or full_token[-1] == ';':
 
-            if guid_stack == [] and full_token != ['\n'] and \
-                    full_token != [';']:
+            # NOTE: Empty tokens ('\n' or ';' alone) were skipped above.
+            if not guid_stack:
 
                 # Special case when we have zero-attribute items (like
                 # #include, #set, module).
@@ -325,7 +376,7 @@ def _parse_token_list(token_list):
         elif full_token[0] == 'schedule':
             # Special code for those ugly schedule objects:
             if full_token[0] == 'schedule':
-                while full_token[-1] not in ['}']:
+                while full_token[-1] != '}':
                     full_token.append(token_list.pop())
                 tree[guid] = {'object': 'schedule', 'name': full_token[1],
                               'cron': ' '.join(full_token[3:-2])}
@@ -339,43 +390,44 @@ def _parse_token_list(token_list):
     # yourself.
     _fix_old_syntax(tree)
 
-    return tree
+    return tree, guid
 
 
 def _fix_old_syntax(tree):
     """Function for 'catching old glm format and translating it.'
     This is intended to work recursively to catch nested objects.
     """
-    for key in list(tree.keys()):
-        if 'object' in list(tree[key].keys()):
+    # NOTE: No items are added to or removed from the tree in this
+    # loop, so there's no need to iterate over a copy.
+    for obj in tree.values():
+        if 'object' in obj:
+            obj_type = obj['object']
             # if no name is present and the object name is the old syntax we
             # need to be creative and pull the object name and use it
-            if 'name' not in list(tree[key].keys()) and \
-                    tree[key]['object'].find(':') >= 0:
-                tree[key]['name'] = tree[key]['object'].replace(':', '_')
+            if 'name' not in obj and ':' in obj_type:
+                obj['name'] = obj_type.replace(':', '_')
 
             # strip the old syntax from the object name
-            tree[key]['object'] = tree[key]['object'].split(':')[0]
+            obj_type = obj['object'] = obj_type.split(':')[0]
 
             # for the remaining syntax we will replace ':' with '_'
-            for line in tree[key]:
+            for line, value in obj.items():
                 try:
-                    tree[key][line] = tree[key][line].replace(':', '_')
+                    obj[line] = value.replace(':', '_')
                 except AttributeError:
                     # If we've hit a dict, recurse.
-                    if isinstance(tree[key][line], dict):
-                        # Since dicts are mutable, and tree[key][line]
-                        # is a dict, this should work just fine for
-                        # updating in place.
-                        _fix_old_syntax(tree={line: tree[key][line]})
+                    if isinstance(value, dict):
+                        # Since dicts are mutable, and value is a dict,
+                        # this should work just fine for updating in
+                        # place.
+                        _fix_old_syntax(tree={line: value})
                     else:
                         raise TypeError("Something weird is going on.")
 
             # if we are working with fuses let's set the mean replace time to 1
             # hour if not specified. Then we aviod a warning!
-            if tree[key]['object'] == 'fuse' \
-                    and 'mean_replacement_time' not in list(tree[key].keys()):
-                tree[key]['mean_replacement_time'] = 3600.0
+            if obj_type == 'fuse' and 'mean_replacement_time' not in obj:
+                obj['mean_replacement_time'] = 3600.0
 
             # # FNCS is not able to handle names that include "-" so we will
             # # replace that with "_".
@@ -396,111 +448,152 @@ def sorted_write(in_tree):
     Write out a GLM from a tree, and order all tree objects by their key.
 
     Sometimes GridLAB-D breaks if you rearrange a GLM.
+
+    NOTE: All keys in the tree must be integers (as created by
+    _parse_token_list and the GLMManager). They're sorted directly,
+    without casting.
     """
 
-    sorted_keys = sorted(list(in_tree.keys()), key=int)
-    output = ''
+    sorted_keys = sorted(in_tree)
+    # All the helpers write their pieces straight into one buffer, so
+    # no intermediate strings get built per object.
+    output = io.StringIO()
+    write = output.write
     try:
         for key in sorted_keys:
-            output += _dict_to_string(in_tree[key]) + '\n'
+            _dict_to_string(in_tree[key], write)
+            write('\n')
     except ValueError:
         raise Exception
-    return output
+    return output.getvalue()
 
 
-def _dict_to_string(in_dict):
+def _dict_to_string(in_dict, write):
     """
-    Helper function: given a single dict representing a GLM object, concatenate
-    it into a string.
+    Helper function: given a single dict representing a GLM object, write
+    it out as a string using the given write function (e.g. the write
+    method of an io.StringIO).
     """
 
     # Handle the different types of dictionaries that are leafs of the tree
-    # root:
-    if 'omftype' in in_dict:
-        return in_dict['omftype'] + ' ' + in_dict['argument'] + ';'
-    elif 'module' in in_dict:
-        return ('module ' + in_dict['module'] + ' {\n'
-                + _gather_key_values(in_dict, 'module') + '}\n')
-    elif 'clock' in in_dict:
-        # return 'clock {\n' + gatherKeyValues(in_dict, 'clock') + '};\n'
-        # This object has known property order issues writing it out explicitly
-        clock_string = 'clock {\n'
-        if 'timezone' in in_dict:
-            clock_string = clock_string + '\ttimezone ' + in_dict[
-                'timezone'] + ';\n'
-        if 'starttime' in in_dict:
-            clock_string = clock_string + '\tstarttime ' + in_dict[
-                'starttime'] + ';\n'
-        if 'stoptime' in in_dict:
-            clock_string = clock_string + '\tstoptime ' + in_dict[
-                'stoptime'] + ';\n'
-        clock_string = clock_string + '}\n'
-        return clock_string
-    elif 'object' in in_dict and in_dict['object'] == 'schedule':
-        return 'schedule ' + in_dict['name'] + ' {\n' + in_dict[
-            'cron'] + '\n};\n'
-    elif 'object' in in_dict:
-        return ('object ' + in_dict['object'] + ' {\n'
-                + _gather_key_values(in_dict, 'object') + '};\n')
-    elif 'omfEmbeddedConfigObject' in in_dict:
-        return in_dict['omfEmbeddedConfigObject'] + ' {\n' + \
-               _gather_key_values(in_dict, 'omfEmbeddedConfigObject') + '};\n'
-    elif '#include' in in_dict:
-        return '#include ' + in_dict['#include']
-    elif '#define' in in_dict:
-        return '#define ' + in_dict['#define'] + '\n'
-    elif '#set' in in_dict:
-        return '#set ' + in_dict['#set']
-    elif 'class' in in_dict:
-        prop = 'class ' + in_dict['class'] + ' {\n'
-        # this section will ensure we can get around the fact that you can't
-        # have two key's with the same name!
-        if 'variable_types' in list(
-                in_dict.keys()) and 'variable_names' in list(
-                in_dict.keys()) and len(in_dict['variable_types']) == len(
-                in_dict['variable_names']):
-
-            for x in range(len(in_dict['variable_types'])):
-                prop += '\t' + in_dict['variable_types'][x] + ' ' + \
-                        in_dict['variable_names'][x] + ';\n'
-
-            prop += '}\n'
-        else:
-            prop += _gather_key_values(in_dict, 'class') + '}\n'
+    # root. The first key found determines how the dict gets written.
+    for key, writer in _DICT_WRITERS.items():
+        if key in in_dict:
+            writer(in_dict, write)
+            return
+
+    raise TypeError('Unknown type! Item: {}'.format(in_dict))
+
+
+def _write_omftype(in_dict, write):
+    write(f"{in_dict['omftype']} {in_dict['argument']};")
+
+
+def _write_module(in_dict, write):
+    write(f"module {in_dict['module']} {{\n")
+    _gather_key_values(in_dict, 'module', write)
+    write('}\n')
+
+
+def _write_clock(in_dict, write):
+    # This object has known property order issues writing it out explicitly
+    write('clock {\n')
+    for key in ('timezone', 'starttime', 'stoptime'):
+        if key in in_dict:
+            write(f'\t{key} {in_dict[key]};\n')
+    write('}\n')
+
+
+def _write_object(in_dict, write):
+    if in_dict['object'] == 'schedule':
+        write(f"schedule {in_dict['name']} {{\n{in_dict['cron']}\n}};\n")
+        return
+
+    write(f"object {in_dict['object']} {{\n")
+    _gather_key_values(in_dict, 'object', write)
+    write('};\n')
+
+
+def _write_embedded_config_object(in_dict, write):
+    write(f"{in_dict['omfEmbeddedConfigObject']} {{\n")
+    _gather_key_values(in_dict, 'omfEmbeddedConfigObject', write)
+    write('};\n')
+
+
+def _write_include(in_dict, write):
+    write(f"#include {in_dict['#include']}")
 
-        return prop
 
+def _write_define(in_dict, write):
+    write(f"#define {in_dict['#define']}\n")
 
-def _gather_key_values(in_dict, key_to_avoid):
+
+def _write_set(in_dict, write):
+    write(f"#set {in_dict['#set']}")
+
+
+def _write_class(in_dict, write):
+    write(f"class {in_dict['class']} {{\n")
+    # this section will ensure we can get around the fact that you can't
+    # have two key's with the same name!
+    if 'variable_types' in in_dict and 'variable_names' in in_dict \
+            and len(in_dict['variable_types']) == len(
+            in_dict['variable_names']):
+
+        for v_type, v_name in zip(in_dict['variable_types'],
+                                  in_dict['variable_names']):
+            write(f'\t{v_type} {v_name};\n')
+
+    else:
+        _gather_key_values(in_dict, 'class', write)
+
+    write('}\n')
+
+
+# Map of keys to the function used to write dicts containing that key.
+# NOTE: The order here matters, as the first key found in a dict
+# determines how it gets written (e.g. objects can have a 'clock'
+# property).
+_DICT_WRITERS = {'omftype': _write_omftype,
+                 'module': _write_module,
+                 'clock': _write_clock,
+                 'object': _write_object,
+                 'omfEmbeddedConfigObject': _write_embedded_config_object,
+                 '#include': _write_include,
+                 '#define': _write_define,
+                 '#set': _write_set,
+                 'class': _write_class}
+
+
+def _gather_key_values(in_dict, key_to_avoid, write):
     """
-    Helper function: put key/value pairs for objects into the format GLD needs.
+    Helper function: put key/value pairs for objects into the format GLD needs,
+    and write them with the given write function.
     """
 
-    other_key_values = ''
-    for key in in_dict:
-        if type(key) is int:
+    for key, value in in_dict.items():
+        if isinstance(key, int):
             # WARNING: RECURSION HERE
-            other_key_values += _dict_to_string(in_dict[key])
+            _dict_to_string(value, write)
         elif key != key_to_avoid:
             if key == 'comment':
-                other_key_values += (in_dict[key] + '\n')
-            elif key == 'name' or key == 'parent':
-                if len(in_dict[key]) <= 62:
-                    other_key_values += (
-                            '\t' + key + ' ' + str(in_dict[key]) + ';\n')
-                else:
-                    warnings.warn(
-                        ("{:s} argument is longer that 64 characters. "
-                         + " Truncating {:s}.").format(key, in_dict[key]),
-                        RuntimeWarning)
-                    other_key_values += ('\t' + key + ' '
-                                         + str(in_dict[key])[0:62]
-                                         + '; // truncated from {:s}\n'.format(
-                                            in_dict[key]))
+                write(f'{value}\n')
+            elif key in _LONG_FIELDS and len(value) > _MAX_NAME_LENGTH:
+                warnings.warn(f'{key} argument is longer than '
+                              f'{_MAX_NAME_LENGTH} characters. Truncating '
+                              f'{value}.', RuntimeWarning)
+                write(f'\t{key} {value[:_MAX_NAME_LENGTH]}; '
+                      f'// truncated from {value}\n')
             else:
-                other_key_values += ('\t' + key + ' ' + str(in_dict[key])
-                                     + ';\n')
-    return other_key_values
+                write(f'\t{key} {value};\n')
+
+
+def _format_clock_time(dt):
+    """Format a datetime.datetime as a quoted GridLAB-D clock time,
+    equivalent to "'" + dt.strftime(GLMManager.DATE_FORMAT) + "'".
+    """
+    return (f"'{dt.year:04d}-{dt.month:02d}-{dt.day:02d} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}'")
 
 
 class GLMManager:
@@ -600,11 +693,12 @@ class GLMManager:
     # Date format for GridLAB-D models. See:
     #   http://gridlab-d.shoutwiki.com/wiki/Clock
     DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
-    # Define items we won't include in the model_map.
-    NO_MAP = ('set', 'include', 'define')
+    # Define items we won't include in the model_map. These are only
+    # used for membership tests, so use frozensets for hashed lookups.
+    NO_MAP = frozenset(('set', 'include', 'define'))
     # Define non-object items.
-    NON_OBJECTS = ('clock', 'module', 'include', 'set', 'define', 'omftype',
-                   'class')
+    NON_OBJECTS = frozenset(('clock', 'module', 'include', 'set', 'define',
+                             'omftype', 'class'))
 
     def __init__(self, model, model_is_path=True):
         """Initialize by parsing given model.
@@ -618,16 +712,15 @@ class GLMManager:
         # Setup logging.
         self.log = logging.getLogger(self.__class__.__name__)
 
-        # Parse the model.
-        self.model_dict = parse(model, model_is_path)
-
-        # The model dict has increasing integer keys so the model can
-        # later be written in order (since GridLAB-D cares sometimes).
-        # Get the first and last keys.
-        keys = list(self.model_dict.keys())
-        # Set keys for adding items to beginning or end of model.
-        self.append_key = max(keys) + 1
-        self.prepend_key = min(keys) - 1
+        # Parse the model. The model dict has increasing integer keys
+        # (starting at 0) so the model can later be written in order
+        # (since GridLAB-D cares sometimes). Set keys for adding items
+        # to beginning or end of model. Note the parser's next guid is
+        # larger than the keys of any nested items, which get moved to
+        # the top level of the model_dict below.
+        self.model_dict, self.append_key = _parse_with_guid(model,
+                                                            model_is_path)
+        self.prepend_key = -1
 
         # Initialize model_map.
         self.model_map = {'clock': [], 'module': {}, 'object': {}, 'class': {},
@@ -872,19 +965,22 @@ class GLMManager:
         if obj_type not in object_map:
             object_map[obj_type] = {}
 
-        try:
-            # Never try to map an already existing named object.
-            if object_dict['name'] in object_map[obj_type]:
-                s = '{} already exists in the {} map!'
-                raise ItemExistsError(s.format(object_dict['name'], obj_type))
+        # Many objects (e.g. recorders) are unnamed, so avoid raising
+        # and catching a KeyError for each of them.
+        name = object_dict.get('name')
 
-        except KeyError:
+        if name is None:
             # Unnamed object. Add it to the unnamed list.
             self.model_map['object_unnamed'].append(key_obj)
 
+        elif name in object_map[obj_type]:
+            # Never try to map an already existing named object.
+            s = '{} already exists in the {} map!'
+            raise ItemExistsError(s.format(name, obj_type))
+
         else:
             # Named object, map it.
-            object_map[obj_type][object_dict['name']] = key_obj
+            object_map[obj_type][name] = key_obj
 
         # No need to return; we're directly updating self.model_map
 
@@ -991,14 +1087,14 @@ class GLMManager:
         :param: obj_name: name of the object to look up.
         :type: obj_name: str
         """
-        try:
-            # Simply look it up by type and name.
-            obj = self.model_map['object'][obj_type][obj_name][1]
-        except KeyError:
+        # Simply look it up by type and name.
+        key_obj = self.model_map['object'].get(obj_type, {}).get(obj_name)
+
+        if key_obj is None:
             # No dice. This object doesn't exist in the model.
-            obj = None
+            return None
 
-        return obj
+        return key_obj[1]
 
     def get_items_by_type(self, item_type, object_type=None):
         """Get data for all objects of the given type. At times, you
@@ -1325,27 +1421,12 @@ class GLMManager:
     @staticmethod
     def _get_item_type(item_dict):
         """Determine type of given item."""
+        # The first key found determines the type, so order matters.
+        for key, item_type in _ITEM_TYPES:
+            if key in item_dict:
+                return item_type
 
-        if 'object' in item_dict:
-            item_type = 'object'
-        elif 'module' in item_dict:
-            item_type = 'module'
-        elif 'clock' in item_dict:
-            item_type = 'clock'
-        elif '#include' in item_dict:
-            item_type = 'include'
-        elif '#set' in item_dict:
-            item_type = 'set'
-        elif '#define' in item_dict:
-            item_type = 'define'
-        elif 'omftype' in item_dict:
-            item_type = 'omftype'
-        elif 'class' in item_dict:
-            item_type = 'class'
-        else:
-            raise TypeError('Unknown type! Item: {}'.format(item_dict))
-
-        return item_type
+        raise TypeError('Unknown type! Item: {}'.format(item_dict))
 
     def _lookup_clock(self):
         try:
@@ -1438,18 +1519,19 @@ class GLMManager:
 
         # Check inputs.
         # NOTE: for the starttime/stoptime, I would prefer to use a
-        # try/catch construct, attempting to use the strftime format.
+        # try/catch construct, attempting to format the times directly.
         # However, if starttime/stoptime are not datetime objects
         # (e.g. date or time), we would get some unexpected times.
+        # NOTE: Times are formatted field by field rather than with
+        # strftime(self.DATE_FORMAT), which avoids the locale-aware
+        # strftime machinery. The output is the same.
         if isinstance(starttime, datetime):
-            clock['starttime'] = ("'" + starttime.strftime(self.DATE_FORMAT)
-                                  + "'")
+            clock['starttime'] = _format_clock_time(starttime)
         elif starttime is not None:
             raise TypeError('starttime must be datetime.datetime or None.')
 
         if isinstance(stoptime, datetime):
-            clock['stoptime'] = ("'" + stoptime.strftime(self.DATE_FORMAT)
-                                 + "'")
+            clock['stoptime'] = _format_clock_time(stoptime)
         elif stoptime is not None:
             raise TypeError('stoptime must be datetime.datetime or None.')
 
@@ -1,10 +1,13 @@
 # Standard library imports
 import unittest
 from unittest.mock import patch, Mock
+import copy
 from datetime import datetime
 import os
 import logging
 import re
+import tempfile
+import warnings
 
 # Import module to test
 from pyvvo import glm, db
@@ -30,9 +33,103 @@ TEST_INVERTER_3_PHASE = os.path.join(MODEL_DIR,
                                      'test_three_phase_inverter_output.glm')
 TEST_SWITCH_MOD = os.path.join(MODEL_DIR, 'test_switch_modifications.glm')
 
+
+def _read_model(path):
+    """Read a model file into a string."""
+    with open(path, 'r') as f:
+        return f.read()
+
+
+# Read the commonly used models once, so tests which don't care about
+# file I/O can build a GLMManager from text. At least one test per file
+# still uses the path form.
+_TEST_FILE_TEXT = _read_model(TEST_FILE)
+_TEST_FILE2_TEXT = _read_model(TEST_FILE2)
+_TEST_FILE3_TEXT = _read_model(TEST_FILE3)
+_IEEE_13_TEXT = _read_model(IEEE_13)
+
 # See if we have database inputs defined.
 DB_ENVIRON_PRESENT = db.db_env_defined()
 
+# Start and stop times for add_run_components tests.
+_RUN_ST = datetime(2012, 1, 1)
+_RUN_ET = datetime(2012, 1, 1, 0, 15)
+
+
+def tmp_glm_path(directory=None):
+    """Get a unique path for writing out a temporary model. Using
+    unique paths (rather than a shared 'tmp.glm') prevents tests from
+    clobbering each other's files.
+
+    :param directory: Directory to create the file in. Defaults to
+        the system's temporary directory. Models which write outputs
+        (e.g. recorder files) relative to where they're run should
+        pass os.getcwd().
+    """
+    fd, path = tempfile.mkstemp(suffix='.glm', dir=directory)
+    os.close(fd)
+    return path
+
+
+class TestTokenizeGLM(unittest.TestCase):
+    """Test _tokenize_glm with model strings."""
+
+    def test_tokenize_glm_simple(self):
+        actual = glm._tokenize_glm('clock {timezone EST+5EDT;};',
+                                   file_path=False)
+        self.assertEqual(['clock', '{', 'timezone', 'EST+5EDT', ';', '}',
+                          ';'], actual)
+
+    def test_tokenize_glm_comments(self):
+        # Comments are dropped, but newlines are kept.
+        s = ('// A comment.\n'
+             'object node { // Another comment.\n'
+             '\tname n1;// No space before this comment.\n'
+             '}\n')
+        actual = glm._tokenize_glm(s, file_path=False)
+        self.assertEqual(['\n', 'object', 'node', '{', '\n', 'name', 'n1',
+                          ';', '\n', '}', '\n'], actual)
+
+    def test_tokenize_glm_carriage_returns(self):
+        actual = glm._tokenize_glm('module tape;\r\nmodule powerflow;\r\n',
+                                   file_path=False)
+        self.assertEqual(['module', 'tape', ';', '\n', 'module', 'powerflow',
+                          ';', '\n'], actual)
+
+    def test_tokenize_glm_parameter_expansion(self):
+        actual = glm._tokenize_glm('positive_sequence_voltage ${VSOURCE};',
+                                   file_path=False)
+        self.assertEqual(['positive_sequence_voltage', '${VSOURCE}', ';'],
+                         actual)
+
+    def test_tokenize_glm_multiple_parameter_expansions(self):
+        actual = glm._tokenize_glm('voltage_A ${VA}; voltage_B ${VB};',
+                                   file_path=False)
+        self.assertEqual(['voltage_A', '${VA}', ';', 'voltage_B', '${VB}',
+                          ';'], actual)
+
+    def test_tokenize_glm_unterminated_parameter_expansion(self):
+        # A '${' without a closing brace isn't an expansion, but the '$'
+        # must not be dropped.
+        actual = glm._tokenize_glm('b${x\n', file_path=False)
+        self.assertEqual(['b$', '{', 'x', '\n'], actual)
+
+    def test_tokenize_glm_url(self):
+        # The '//' in a URL does not start a comment.
+        actual = glm._tokenize_glm(
+            '#set stylesheet=http://gridlab-d.shoutwiki.com/gridlabd.xsl\n',
+            file_path=False)
+        self.assertEqual(['#set',
+                          'stylesheet=http://gridlab-d.shoutwiki.com/'
+                          'gridlabd.xsl', '\n'], actual)
+
+    def test_tokenize_glm_regex_compiled_once(self):
+        # The tokenizing regex is compiled at import, and not per call.
+        self.assertIsInstance(glm._TOKEN_RE, re.Pattern)
+        with patch('re.compile') as mock:
+            glm.parse('clock {timezone EST+5EDT;};', file_path=False)
+            mock.assert_not_called()
+
 
 class TestParseFile(unittest.TestCase):
     """Test parsing a test file."""
@@ -238,12 +335,10 @@ class TestGLMManager(unittest.TestCase):
         # Add recorder.
         self._GLMManager.add_item(r)
 
-        # Ensure its in the map and the key is correct.
-        in_map = False
-        for item in self._GLMManager.model_map['object_unnamed']:
-            in_map = in_map or ((item[1] is r) and (item[0] == k))
-
-        self.assertTrue(in_map)
+        # Ensure its in the map (at the end) and the key is correct.
+        last = self._GLMManager.model_map['object_unnamed'][-1]
+        self.assertEqual(k, last[0])
+        self.assertIs(r, last[1])
 
         # Ensure its in the model (at the end)
         self.assertIs(r, self._GLMManager.model_dict[k])
@@ -427,48 +522,20 @@ class TestGLMManager(unittest.TestCase):
         # Ensure they're gone in map.
         obj = self._GLMManager._lookup_object(object_type='overhead_line',
                                               object_name='ol_3')
-        try:
-            obj['phases']
-        except KeyError:
-            self.assertTrue(True)
-        else:
-            self.assertTrue(False, 'phases not successfully removed from '
-                                   'model_map.')
-
-        try:
-            obj['length']
-        except KeyError:
-            self.assertTrue(True)
-        else:
-            self.assertTrue(False, 'length not successfully removed. from '
-                                   'model_map')
+        self.assertNotIn('phases', obj, 'phases not successfully removed '
+                                        'from model_map.')
+        self.assertNotIn('length', obj, 'length not successfully removed '
+                                        'from model_map.')
 
         # Ensure they're gone in the model.
         obj = self._GLMManager.model_dict[15]
-
-        try:
-            obj['phases']
-        except KeyError:
-            self.assertTrue(True)
-        else:
-            self.assertTrue(False, 'phases not successfully removed from '
-                                   'model_dict.')
-
-        try:
-            obj['length']
-        except KeyError:
-            self.assertTrue(True)
-        else:
-            self.assertTrue(False, 'length not successfully removed. from '
-                                   'model_dict')
+        self.assertNotIn('phases', obj, 'phases not successfully removed '
+                                        'from model_dict.')
+        self.assertNotIn('length', obj, 'length not successfully removed '
+                                        'from model_dict.')
 
         # Ensure 'to' is still present.
-        try:
-            obj['to']
-        except KeyError:
-            self.assertTrue(False, 'to inadvertently removed from the object!')
-        else:
-            self.assertTrue(True)
+        self.assertIn('to', obj, 'to inadvertently removed from the object!')
 
     def test_remove_properties_from_clock(self):
         item = {'clock': 'clock'}
@@ -478,40 +545,21 @@ class TestGLMManager(unittest.TestCase):
 
         # Ensure stoptime is gone in the map.
         clock = self._GLMManager._lookup_clock()
-
-        try:
-            clock['stoptime']
-        except KeyError:
-            self.assertTrue(True)
-        else:
-            self.assertTrue(False, 'stoptime not successfully removed from '
-                                   'the clock in the model_map.')
+        self.assertNotIn('stoptime', clock, 'stoptime not successfully '
+                                            'removed from the clock in the '
+                                            'model_map.')
 
         # Ensure its gone in the model
-        try:
-            self._GLMManager.model_dict[4]['stoptime']
-        except KeyError:
-            self.assertTrue(True)
-        else:
-            self.assertTrue(False, 'stoptime not successfully removed from '
-                                   'the clock in the model_dict.')
+        self.assertNotIn('stoptime', self._GLMManager.model_dict[4],
+                         'stoptime not successfully removed from the clock '
+                         'in the model_dict.')
 
         # Ensure we still have the starttime
-        try:
-            clock['starttime']
-        except KeyError:
-            self.assertTrue(False, 'starttime inadvertently removed from the '
-                                   'clock in the model_map')
-        else:
-            self.assertTrue(True)
-
-        try:
-            self._GLMManager.model_dict[4]['starttime']
-        except KeyError:
-            self.assertTrue(False, 'starttime inadvertently removed from the '
-                                   'clock in the model_dict')
-        else:
-            self.assertTrue(True)
+        self.assertIn('starttime', clock, 'starttime inadvertently removed '
+                                          'from the clock in the model_map')
+        self.assertIn('starttime', self._GLMManager.model_dict[4],
+                      'starttime inadvertently removed from the clock in the '
+                      'model_dict')
 
     def test_object_present_bad_type(self):
         self.assertRaises(TypeError, self._GLMManager.object_type_present, 10)
@@ -545,8 +593,13 @@ class TestGLMManagerRemove(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        # Get a GLMManager object
-        cls._GLMManager = glm.GLMManager(TEST_FILE, True)
+        # Parse the model once. Each test gets its own copy, since
+        # these tests modify the model.
+        cls._template = glm.GLMManager(_TEST_FILE_TEXT, False)
+
+    def setUp(self):
+        # Copying is much cheaper than parsing the model again.
+        self._GLMManager = copy.deepcopy(self._template)
 
     def test_remove_clock(self):
         # Remove clock.
@@ -684,15 +737,14 @@ class TestGLMManagerMisc(unittest.TestCase):
         self.assertEqual(len(obj_list), 3)
 
         # Ensure all elements are dictionaries.
-        for d in obj_list:
-            with self.subTest():
-                self.assertIsInstance(d, dict)
+        bad = next((i for i, d in enumerate(obj_list)
+                    if not isinstance(d, dict)), None)
+        self.assertIsNone(bad, f'Element {bad} is not a dictionary.')
 
         # Ensure all objects have a 'from' and 'to'
-        for d in obj_list:
-            with self.subTest():
-                self.assertIn('from', d)
-                self.assertIn('to', d)
+        bad = next((i for i, d in enumerate(obj_list)
+                    if 'from' not in d or 'to' not in d), None)
+        self.assertIsNone(bad, f"Element {bad} is missing 'from' or 'to'.")
 
     def test_get_items_by_type_clock(self):
         c = self._GLMManager.get_items_by_type(item_type='clock')
@@ -742,7 +794,14 @@ class AddOrModifyClockTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """Get a GLMManager. Use the simpler model for speed."""
-        cls.glm = glm.GLMManager(model=TEST_FILE2, model_is_path=True)
+        cls._template = glm.GLMManager(model=_TEST_FILE2_TEXT,
+                                       model_is_path=False)
+
+    def setUp(self):
+        """Give each test its own copy of the model, since some tests
+        remove or modify the clock.
+        """
+        self.glm = copy.deepcopy(self._template)
 
     def test_add_or_modify_clock_bad_starttime_type(self):
         self.assertRaises(TypeError, self.glm.add_or_modify_clock,
@@ -783,16 +842,13 @@ class AddOrModifyClockTestCase(unittest.TestCase):
         self.test_add_or_modify_clock_change_all()
 
     def test_add_or_modify_clock_add_clock_incomplete_inputs(self):
-        # To avoid interfering with other tests, we'll create our own
-        # manager here.
-        glm_manager = glm.GLMManager(model=TEST_FILE2, model_is_path=True)
         # Remove the clock.
-        glm_manager.remove_item({'clock': 'clock'})
+        self.glm.remove_item({'clock': 'clock'})
         # Add new one, but don't include all inputs.
         st = datetime(year=2016, month=12, day=6)
         et = None
         tz = 'Central'
-        self.assertRaises(ValueError, glm_manager.add_or_modify_clock,
+        self.assertRaises(ValueError, self.glm.add_or_modify_clock,
                           starttime=st, stoptime=et, timezone=tz)
 
 
@@ -802,53 +858,52 @@ class AddRunComponentsBadInputsTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """Load a model."""
-        cls.glm = glm.GLMManager(TEST_FILE3, model_is_path=True)
+        cls._template = glm.GLMManager(_TEST_FILE3_TEXT, model_is_path=False)
+
+    def setUp(self):
+        """Give each test its own copy of the model, since
+        add_run_components may modify it before an input is rejected.
+        """
+        self.glm = copy.deepcopy(self._template)
 
-    def test_add_run_components_add_or_modify_clock_is_called(self):
+    @patch.object(glm.GLMManager, 'add_or_modify_clock', return_value=None)
+    def test_add_run_components_add_or_modify_clock_is_called(self, mock):
         """add_or_modify_clock will handle input checking for starttime,
         stoptime, and timezone, so we need to ensure it gets called.
         """
-        with patch('pyvvo.glm.GLMManager.add_or_modify_clock',
-                   return_value=None) as mock:
-            self.glm.add_run_components(starttime='bleh', stoptime='blah',
-                                        timezone='Eastern')
-            mock.assert_called_once()
-            mock.assert_called_with(starttime='bleh', stoptime='blah',
+        self.glm.add_run_components(starttime='bleh', stoptime='blah',
                                     timezone='Eastern')
-
-        self.assertTrue(True)
+        mock.assert_called_once()
+        mock.assert_called_with(starttime='bleh', stoptime='blah',
+                                timezone='Eastern')
 
     def test_add_run_components_v_source_bad_type(self):
         self.assertRaises(ValueError, self.glm.add_run_components,
-                          starttime=datetime(2012, 1, 1),
-                          stoptime=datetime(2012, 1, 1, 0, 15),
+                          starttime=_RUN_ST, stoptime=_RUN_ET,
                           timezone='UTC0', v_source='one thousand')
 
     def test_add_run_components_profiler_bad_type(self):
         self.assertRaises(TypeError, self.glm.add_run_components,
-                          starttime=datetime(2012, 1, 1),
-                          stoptime=datetime(2012, 1, 1, 0, 15),
+                          starttime=_RUN_ST, stoptime=_RUN_ET,
                           timezone='UTC0', profiler='0')
 
     def test_add_run_components_profiler_bad_value(self):
         self.assertRaises(ValueError, self.glm.add_run_components,
-                          starttime=datetime(2012, 1, 1),
-                          stoptime=datetime(2012, 1, 1, 0, 15),
+                          starttime=_RUN_ST, stoptime=_RUN_ET,
                           timezone='UTC0', profiler=2)
 
     def test_add_run_components_minimum_timestep_bad_type(self):
         self.assertRaises(TypeError, self.glm.add_run_components,
-                          starttime=datetime(2012, 1, 1),
-                          stoptime=datetime(2012, 1, 1, 0, 15),
+                          starttime=_RUN_ST, stoptime=_RUN_ET,
                           timezone='UTC0', minimum_timestep=60.1)
 
 
-class AddRunComponentsTestCase(unittest.TestCase):
-    """Call add_run_components with no arguments, model should run.
+class AddRunComponentsMixin:
+    """Load MODEL and call add_run_components on it in setUpClass.
 
-    We already have a test ensuring add_or_modify_clock is called, so
-    no need to check clock values. However, we need to ensure the clock
-    is present, and also need to check the other parameters.
+    Shared by the test cases which check the added components and the
+    test cases which run the resulting model, so they're guaranteed to
+    use the same arguments.
     """
     # Define the model we'll use.
     MODEL = TEST_FILE3
@@ -858,24 +913,18 @@ class AddRunComponentsTestCase(unittest.TestCase):
         """Load model, add components."""
         cls.glm = glm.GLMManager(cls.MODEL, model_is_path=True)
 
-        cls.out_file = 'tmp.glm'
-        cls.glm.add_run_components(starttime=datetime(2012, 1, 1),
-                                   stoptime=datetime(2012, 1, 1, 0, 15),
+        cls.glm.add_run_components(starttime=_RUN_ST, stoptime=_RUN_ET,
                                    timezone='UTC0', v_source=None,
                                    profiler=0, minimum_timestep=60)
 
-        cls.glm.write_model(out_path=cls.out_file)
-
-    @classmethod
-    def tearDownClass(cls):
-        # noinspection PyUnresolvedReferences
-        os.remove(cls.out_file)
 
-    @unittest.skipIf(not gld_installed(), reason='GridLAB-D is not installed.')
-    def test_add_run_components_model_runs(self):
-        result = run_gld(model_path=self.out_file)
+class AddRunComponentsTestCase(AddRunComponentsMixin, unittest.TestCase):
+    """Call add_run_components with no arguments, model should run.
 
-        self.assertEqual(0, result.returncode)
+    We already have a test ensuring add_or_modify_clock is called, so
+    no need to check clock values. However, we need to ensure the clock
+    is present, and also need to check the other parameters.
+    """
 
     def test_add_run_components_clock(self):
         """Ensure the clock is there."""
@@ -886,28 +935,28 @@ class AddRunComponentsTestCase(unittest.TestCase):
     def test_add_run_components_minimum_timestep(self):
         minimum_timestep = self.glm.model_dict[-7]
 
-        self.assertDictEqual(minimum_timestep, {'#set': 'minimum_timestep=60'})
+        self.assertEqual(minimum_timestep, {'#set': 'minimum_timestep=60'})
 
     def test_add_run_components_profiler(self):
         profiler = self.glm.model_dict[-6]
 
-        self.assertDictEqual(profiler, {'#set': 'profiler=0'})
+        self.assertEqual(profiler, {'#set': 'profiler=0'})
 
     def test_add_run_components_relax_naming_rules(self):
         rnr = self.glm.model_dict[-5]
 
-        self.assertDictEqual(rnr, {'#set': 'relax_naming_rules=1'})
+        self.assertEqual(rnr, {'#set': 'relax_naming_rules=1'})
 
     def test_add_run_components_powerflow(self):
         pf = self.glm.model_dict[-2]
 
-        self.assertDictEqual(pf, {'module': 'powerflow', 'solver_method': 'NR',
-                                  'line_capacitance': 'TRUE'})
+        self.assertEqual(pf, {'module': 'powerflow', 'solver_method': 'NR',
+                              'line_capacitance': 'TRUE'})
 
     def test_add_run_components_v_source(self):
         vs = self.glm.model_dict[-1]
 
-        self.assertDictEqual(vs, {'#define': 'VSOURCE=66395.28'})
+        self.assertEqual(vs, {'#define': 'VSOURCE=66395.28'})
 
     def test_add_run_components_generators(self):
         """This model should not have the generators added."""
@@ -962,29 +1011,63 @@ class AddRunComponentsIEEE13NodeTestCase(AddRunComponentsTestCase):
     def test_add_run_components_minimum_timestep(self):
         minimum_timestep = self.glm.model_dict[-8]
 
-        self.assertDictEqual(minimum_timestep, {'#set': 'minimum_timestep=60'})
+        self.assertEqual(minimum_timestep, {'#set': 'minimum_timestep=60'})
 
     def test_add_run_components_profiler(self):
         profiler = self.glm.model_dict[-7]
 
-        self.assertDictEqual(profiler, {'#set': 'profiler=0'})
+        self.assertEqual(profiler, {'#set': 'profiler=0'})
 
     def test_add_run_components_relax_naming_rules(self):
         rnr = self.glm.model_dict[-6]
 
-        self.assertDictEqual(rnr, {'#set': 'relax_naming_rules=1'})
+        self.assertEqual(rnr, {'#set': 'relax_naming_rules=1'})
 
 
-class NestedObjectsIEEE13TestCase(unittest.TestCase):
-    """Ensure that nested objects get properly mapped."""
+@unittest.skipIf(not gld_installed(), reason='GridLAB-D is not installed.')
+class AddRunComponentsModelRunsTestCase(AddRunComponentsMixin,
+                                        unittest.TestCase):
+    """Call add_run_components, write the model, and ensure it runs.
 
-    # Define the model we'll use.
+    This lives in its own class so the model is only written (and the
+    class set up at all) when GridLAB-D is installed.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Load model, add components, save to file."""
+        super().setUpClass()
+
+        cls.out_file = tmp_glm_path()
+        cls.glm.write_model(out_path=cls.out_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        # noinspection PyUnresolvedReferences
+        if os.path.exists(cls.out_file):
+            os.remove(cls.out_file)
+
+    def test_add_run_components_model_runs(self):
+        result = run_gld(model_path=self.out_file)
+
+        self.assertEqual(0, result.returncode)
+
+
+class AddRunComponentsModelRunsIEEE13NodeTestCase(
+        AddRunComponentsModelRunsTestCase):
+    """Run AddRunComponentsModelRunsTestCase with the IEEE 13 bus
+    model.
+    """
     MODEL = IEEE_13
 
+
+class NestedObjectsIEEE13TestCase(unittest.TestCase):
+    """Ensure that nested objects get properly mapped."""
+
     @classmethod
     def setUpClass(cls):
-        """Load model, add components."""
-        cls.glm = glm.GLMManager(cls.MODEL, model_is_path=True)
+        """Load model."""
+        cls.glm = glm.GLMManager(_IEEE_13_TEXT, model_is_path=False)
 
     def test_nested_objects_ieee_13_solar_in_map(self):
         self.assertTrue(self.glm.object_type_present('solar'))
@@ -1001,15 +1084,17 @@ class NestedObjectsDoubleNestTestCase(unittest.TestCase):
     def setUpClass(cls):
         """Load, save to file."""
         cls.glm = glm.GLMManager(TEST_FILE4, model_is_path=True)
-        cls.glm.write_model('tmp.glm')
+        cls.out_file = tmp_glm_path()
+        cls.glm.write_model(cls.out_file)
 
     @classmethod
     def tearDownClass(cls):
-        os.remove('tmp.glm')
+        if os.path.exists(cls.out_file):
+            os.remove(cls.out_file)
 
     def test_nested_objects_double_nesting(self):
 
-        with open('tmp.glm', 'r') as f:
+        with open(self.out_file, 'r') as f:
             actual = f.read()
 
         with open(EXPECTED4, 'r') as f:
@@ -1018,6 +1103,75 @@ class NestedObjectsDoubleNestTestCase(unittest.TestCase):
         self.assertEqual(actual, expected)
 
 
+class NestedObjectsLastItemTestCase(unittest.TestCase):
+    """Ensure adding items doesn't clobber nested items which were
+    un-nested from the last item in the model.
+    """
+
+    def setUp(self):
+        s = """
+        object meter {
+          name meter_1;
+          object recorder {
+            name recorder_1;
+            interval 60;
+          };
+        }
+        """
+        self.glm = glm.GLMManager(model=s, model_is_path=False)
+
+    def test_nested_objects_last_item_keys(self):
+        self.assertEqual(-1, self.glm.prepend_key)
+        self.assertEqual(2, self.glm.append_key)
+
+    def test_nested_objects_last_item_add(self):
+        self.glm.add_item({'object': 'node', 'name': 'node_1'})
+        self.assertIsNotNone(self.glm.find_object('node', 'node_1'))
+        # The recorder should still be in the model.
+        r = self.glm.find_object('recorder', 'recorder_1')
+        self.assertIn(r, self.glm.model_dict.values())
+
+
+class WriteModelLongNamesTestCase(unittest.TestCase):
+    """Ensure names and parents longer than GridLAB-D allows get
+    truncated (with a warning) when the model is written.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # 63 characters is one too many, 62 is the limit.
+        cls.long_name = 'n' * 63
+        cls.ok_parent = 'p' * 62
+        s = """
+        object meter {{
+          name {};
+          parent {};
+        }}
+        """.format(cls.long_name, cls.ok_parent)
+        cls.glm = glm.GLMManager(model=s, model_is_path=False)
+
+    def test_write_model_long_name_truncated(self):
+        with self.assertWarns(RuntimeWarning) as cm:
+            out = self.glm.write_model(out_path=None)
+
+        # Only the name should trigger a warning.
+        self.assertIn(self.long_name, str(cm.warning))
+        self.assertNotIn(self.ok_parent, str(cm.warning))
+
+        self.assertIn('\tname {}; // truncated from {}\n'.format(
+            self.long_name[:62], self.long_name), out)
+
+    def test_write_model_parent_at_limit_not_truncated(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            out = self.glm.write_model(out_path=None)
+
+        # Exactly one warning, for the name.
+        self.assertEqual(1, len(w))
+        self.assertIs(w[0].category, RuntimeWarning)
+        self.assertIn('\tparent {};\n'.format(self.ok_parent), out)
+
+
 @unittest.skipIf(not gld_installed(), reason='GridLAB-D is not installed.')
 @unittest.skipIf(not DB_ENVIRON_PRESENT,
                  reason='Database environment variables are not present.')
@@ -1030,7 +1184,7 @@ class RunModelWithDatabaseTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         # Use the simplest model.
-        cls.glm_mgr = glm.GLMManager(TEST_FILE2, model_is_path=True)
+        cls.glm_mgr = glm.GLMManager(_TEST_FILE2_TEXT, model_is_path=False)
 
         # Add the MySQL module.
         cls.glm_mgr.add_item({'module': 'mysql'})
@@ -1045,7 +1199,10 @@ class RunModelWithDatabaseTestCase(unittest.TestCase):
                               'port': os.environ['DB_PORT'],
                               'schema': os.environ['DB_DB']})
 
-        cls.out_file = 'tmp_db.glm'
+        # GridLAB-D writes gridlabd.xml next to the model, and we
+        # clean it up from the working directory, so write the model
+        # there.
+        cls.out_file = tmp_glm_path(os.getcwd())
         cls.glm_mgr.write_model(cls.out_file)
 
         # It can take a while to get the database up and running with
@@ -1054,7 +1211,8 @@ class RunModelWithDatabaseTestCase(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        os.remove(cls.out_file)
+        if os.path.exists(cls.out_file):
+            os.remove(cls.out_file)
         try:
             os.remove('gridlabd.xml')
         except FileNotFoundError:
@@ -1071,7 +1229,7 @@ class AddSubstationMeter13TestCase(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.mgr = glm.GLMManager(IEEE_13, model_is_path=True)
+        cls.mgr = glm.GLMManager(_IEEE_13_TEXT, model_is_path=False)
         cls.meter = cls.mgr.add_substation_meter()
 
     def test_meter_object(self):
@@ -1109,7 +1267,7 @@ class UpdateRegTapsTestCase(unittest.TestCase):
     """Test update_reg_taps"""
     @classmethod
     def setUpClass(cls):
-        cls.mgr = glm.GLMManager(IEEE_13, model_is_path=True)
+        cls.mgr = glm.GLMManager(_IEEE_13_TEXT, model_is_path=False)
 
     def test_bad_reg_name(self):
         with self.assertRaisesRegex(ValueError, 'There is no regulator'):
@@ -1120,7 +1278,7 @@ class UpdateRegTapsTestCase(unittest.TestCase):
             self.mgr.update_reg_taps('"reg_Reg"', {'a': 7, 'b': 2, 'c': 9})
 
     def test_missing_regulator_configuration(self):
-        mgr = glm.GLMManager(IEEE_13, model_is_path=True)
+        mgr = glm.GLMManager(_IEEE_13_TEXT, model_is_path=False)
         mgr.remove_item({'object': 'regulator_configuration',
                          'name': '"rcon_Reg"'})
         with self.assertRaisesRegex(ValueError, 'While the regulator '):
@@ -1140,7 +1298,7 @@ class UpdateRegTapsTestCase(unittest.TestCase):
 
     def test_update_nonexistent_phase(self):
         # Get an independent manager.
-        mgr = glm.GLMManager(IEEE_13, model_is_path=True)
+        mgr = glm.GLMManager(_IEEE_13_TEXT, model_is_path=False)
 
         # Lookup the regulator.
         reg = mgr.find_object(obj_type='regulator', obj_name='"reg_Reg"')
@@ -1170,7 +1328,7 @@ class UpdateCapSwitchesTestCase(unittest.TestCase):
     """Test update_cap_switches"""
     @classmethod
     def setUpClass(cls):
-        cls.mgr = glm.GLMManager(IEEE_13, model_is_path=True)
+        cls.mgr = glm.GLMManager(_IEEE_13_TEXT, model_is_path=False)
 
     def test_bad_cap_name(self):
         with self.assertRaisesRegex(ValueError, 'There is no capacitor named'):
@@ -1214,18 +1372,18 @@ class IEEE9500RunsTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         cls.mgr = glm.GLMManager(IEEE_9500, model_is_path=True)
-        cls.mgr.add_run_components(starttime=datetime(2012, 1, 1),
-                                   stoptime=datetime(2012, 1, 1, 0, 15),
+        cls.mgr.add_run_components(starttime=_RUN_ST, stoptime=_RUN_ET,
                                    timezone='UTC0', v_source=None,
                                    profiler=0, minimum_timestep=60)
 
-        cls.out_file = 'test_9500.glm'
+        cls.out_file = tmp_glm_path()
         cls.mgr.write_model(cls.out_file)
 
     @classmethod
     def tearDownClass(cls):
         # noinspection PyUnresolvedReferences
-        os.remove(cls.out_file)
+        if os.path.exists(cls.out_file):
+            os.remove(cls.out_file)
 
     @unittest.skipIf(not gld_installed(), reason='GridLAB-D is not installed.')
     def test_add_run_components_model_runs(self):
@@ -1283,7 +1441,7 @@ class ClearAllTriplexLoadsTestCase(unittest.TestCase):
         should get a warning.
         """
         # Get a manger.
-        mgr = glm.GLMManager(TEST_FILE2, model_is_path=True)
+        mgr = glm.GLMManager(_TEST_FILE2_TEXT, model_is_path=False)
 
         # Ensure we get a warning.
         with self.assertLogs(logger=mgr.log, level='WARN'):
@@ -1344,7 +1502,7 @@ class RemoveAllSolarTestCase(unittest.TestCase):
         """Test remove_all_solar operates correctly when the initial
         model does not have any solar in it.
         """
-        mgr = glm.GLMManager(model=TEST_FILE)
+        mgr = glm.GLMManager(model=_TEST_FILE_TEXT, model_is_path=False)
 
         # Start by ensuring there's no solar.
         solar = mgr.get_objects_by_type(object_type='solar')
@@ -1551,18 +1709,18 @@ class SubstationMeterTapeTestCase(unittest.TestCase):
         # Add the tape module.
         cls.glm_mgr.add_item({'module': 'tape'})
 
-        # Write model to file.
-        cls.out_model = 'test_sub_meter_tape.glm'
+        # Write model to file. The recorder's csv is written relative
+        # to the model, and read back relative to the working
+        # directory, so the model must live in the working directory.
+        cls.out_model = tmp_glm_path(os.getcwd())
         cls.glm_mgr.write_model(cls.out_model)
 
     @classmethod
     def tearDownClass(cls) -> None:
         # Remove the model.
-        try:
-            # noinspection PyUnresolvedReferences
+        # noinspection PyUnresolvedReferences
+        if os.path.exists(cls.out_model):
             os.remove(cls.out_model)
-        except FileNotFoundError:
-            pass
 
         # Remove the csv file.
         try:
@@ -1623,17 +1781,15 @@ class SubstationMeterMySQLTestCase(unittest.TestCase):
         cls.glm_mgr.add_item({'module': 'mysql'})
 
         # Write model to file.
-        cls.out_model = 'test_sub_meter_tape.glm'
+        cls.out_model = tmp_glm_path()
         cls.glm_mgr.write_model(cls.out_model)
 
     @classmethod
     def tearDownClass(cls) -> None:
         # Remove the model.
-        try:
-            # noinspection PyUnresolvedReferences
+        # noinspection PyUnresolvedReferences
+        if os.path.exists(cls.out_model):
             os.remove(cls.out_model)
-        except FileNotFoundError:
-            pass
 
         # Drop the table.
         db_conn = db.connect_loop(timeout=1)
@@ -1790,7 +1946,7 @@ class GetItemsAndObjectsAfterRemovalTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
         # Load model.
-        cls.mgr = glm.GLMManager(TEST_FILE)
+        cls.mgr = glm.GLMManager(_TEST_FILE_TEXT, model_is_path=False)
 
         # Get overhead lines.
         lines = cls.mgr.get_objects_by_type(object_type='overhead_line')
@@ -1856,7 +2012,7 @@ class LoopOverObjectsHelperTestCase(unittest.TestCase):
     """Test the loop_over_objects_helper method of GLMManager."""
     @classmethod
     def setUpClass(cls) -> None:
-        cls.mgr = glm.GLMManager(model=TEST_FILE)
+        cls.mgr = glm.GLMManager(model=_TEST_FILE_TEXT, model_is_path=False)
 
     def test_missing_object_type(self):
         with self.assertRaisesRegex(KeyError, 'The given object_type bleh'):
@@ -1883,7 +2039,7 @@ class LoopOverObjectsHelperTestCase(unittest.TestCase):
             self.assertDictEqual(kwargs, {'silly_arg': 'hello'})
 
     def test_runtime_error_for_removal(self):
-        mgr = glm.GLMManager(model=TEST_FILE)
+        mgr = glm.GLMManager(model=_TEST_FILE_TEXT, model_is_path=False)
         with self.assertRaises(RuntimeError):
             mgr.loop_over_objects_helper(object_type='load',
                                          func=mgr.remove_item)
@@ -1894,9 +2050,14 @@ class ConvertSwitchStatusToThreePhaseTestCase(unittest.TestCase):
     GLMManager.
     """
     @classmethod
-    def tearDownClass(cls) -> None:
+    def setUpClass(cls) -> None:
         # Model written in test_model_runs_after_modifications
-        os.remove('tmp.glm')
+        cls.out_file = tmp_glm_path()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if os.path.exists(cls.out_file):
+            os.remove(cls.out_file)
 
     def test_no_switches(self):
         mgr = glm.GLMManager(EXPECTED4)
@@ -1980,10 +2141,10 @@ class ConvertSwitchStatusToThreePhaseTestCase(unittest.TestCase):
         mgr.convert_switch_status_to_three_phase(banked=False)
 
         # Write out to file.
-        mgr.write_model(out_path='tmp.glm')
+        mgr.write_model(out_path=self.out_file)
 
         # Run it.
-        result2 = run_gld('tmp.glm')
+        result2 = run_gld(self.out_file)
         self.assertEqual(result2.returncode, 0)
         self.check_for_error(result2.stderr)
         self.check_for_error(result2.stdout)